@@ -4,6 +4,7 @@ Content generation agent for Instagram posts
 
 import os
 import json
+import time
 import logging
 import hashlib
 import datetime
@@ -11,8 +12,13 @@ from typing import Dict, Any, List, Optional
 from pydantic import BaseModel, Field, conlist
 from langchain_core.tools import Tool
 from langchain_core.messages import HumanMessage
+from langchain_community.tools import DuckDuckGoSearchRun
+from langgraph.prebuilt import create_react_agent
+from langgraph.types import Command
 from pathlib import Path
 
+from ..prompt_loader import read_prompt
+
 logger = logging.getLogger("ig_agent.content_agent")
 
 class SearchDecision(BaseModel):
@@ -68,17 +74,23 @@ class ContentAgent:
             "content_generation.txt"
         )
         
-        # Set up search tool with retry logic
-        from langchain_community.tools import DuckDuckGoSearchRun
-        import time
+        # Set up search tool with retry logic; one search client serves every query,
+        # and results are kept per query, since retries and repeated generate()
+        # calls tend to ask the same questions again
+        search = DuckDuckGoSearchRun()
+        search_cache = {}
         
         def search_with_retry(query: str, max_retries: int = 3) -> str:
             """Search with retry logic for rate limits"""
+            if query in search_cache:
+                return search_cache[query]
+            
             for attempt in range(max_retries):
                 try:
-                    search = DuckDuckGoSearchRun()
                     time.sleep(1)  # Add delay to avoid rate limits
-                    return search.run(query)
+                    result = search.run(query)
+                    search_cache[query] = result
+                    return result
                 except Exception as e:
                     if "ratelimit" in str(e).lower() or "rate" in str(e).lower():
                         if attempt < max_retries - 1:
@@ -93,12 +105,10 @@ class ContentAgent:
             description="Search the web for information about AI and data science topics. Use this for finding latest information."
         )
         
-        # Load prompt
-        with open(self.prompt_path, 'r') as f:
-            self.prompt = f.read()
+        # Load prompt (cached across agent instances)
+        self.prompt = read_prompt(self.prompt_path)
             
         # Create ReAct agent
-        from langgraph.prebuilt import create_react_agent
         self.react_agent = create_react_agent(
             llm, 
             tools=[self.search_tool], 
@@ -113,8 +123,9 @@ class ContentAgent:
         else:
             self.history_file = history_file
         
-        # Initialize or load content history
+        # Initialize or load content history; signatures are indexed for duplicate checks
         self.content_history = self._load_history()
+        self._history_signatures = {entry.get('signature') for entry in self.content_history}
     
     def _load_history(self) -> List[Dict[str, Any]]:
         """
@@ -143,17 +154,16 @@ class ContentAgent:
         except Exception as e:
             logger.error(f"Failed to save content history: {str(e)}")
     
-    def _check_duplicate(self, content_json: Dict[str, Any]) -> bool:
+    def _content_signature(self, content_json: Dict[str, Any]) -> str:
         """
-        Check if content is a duplicate
+        Create a signature of the content's headings, hashtag and page titles
         
         Args:
-            content_json: Content to check
+            content_json: Content to sign
             
         Returns:
-            True if duplicate, False otherwise
+            Hex digest identifying the content
         """
-        # Create a content signature based on important fields
         content_fields = [
             content_json.get('cover', {}).get('heading_line1', ''),
             content_json.get('cover', {}).get('heading_line2', ''),
@@ -164,15 +174,19 @@ class ContentAgent:
         for page in content_json.get('content_pages', []):
             content_fields.append(page.get('title', ''))
         
-        # Create a hash of the content
-        content_signature = hashlib.md5(''.join(content_fields).encode('utf-8')).hexdigest()
-        
-        # Check if this signature exists in history
-        for entry in self.content_history:
-            if entry.get('signature') == content_signature:
-                return True
+        return hashlib.md5(''.join(content_fields).encode('utf-8')).hexdigest()
+    
+    def _check_duplicate(self, content_json: Dict[str, Any]) -> bool:
+        """
+        Check if content is a duplicate
         
-        return False
+        Args:
+            content_json: Content to check
+            
+        Returns:
+            True if duplicate, False otherwise
+        """
+        return self._content_signature(content_json) in self._history_signatures
     
     def _add_to_history(self, content_json: Dict[str, Any]) -> None:
         """
@@ -181,18 +195,7 @@ class ContentAgent:
         Args:
             content_json: Content to add
         """
-        # Create a content signature
-        content_fields = [
-            content_json.get('cover', {}).get('heading_line1', ''),
-            content_json.get('cover', {}).get('heading_line2', ''),
-            content_json.get('cover', {}).get('hashtag', '')
-        ]
-        
-        # Add the titles of content pages
-        for page in content_json.get('content_pages', []):
-            content_fields.append(page.get('title', ''))
-        
-        content_signature = hashlib.md5(''.join(content_fields).encode('utf-8')).hexdigest()
+        content_signature = self._content_signature(content_json)
         
         # Add to history
         self.content_history.append({
@@ -207,6 +210,9 @@ class ContentAgent:
         # Limit history to most recent 100 entries
         if len(self.content_history) > 100:
             self.content_history = self.content_history[-100:]
+            self._history_signatures = {entry.get('signature') for entry in self.content_history}
+        else:
+            self._history_signatures.add(content_signature)
         
         # Save history
         self._save_history()
@@ -223,6 +229,7 @@ class ContentAgent:
             Dict containing generated content
         """
         attempt = 0
+        retry_request = None
         
         while attempt < max_attempts:
             attempt += 1
@@ -230,11 +237,14 @@ class ContentAgent:
             # For retry attempts, add warnings about previous content and validation requirements
             current_request = request
             if attempt > 1:
-                prev_topics = ", ".join([entry.get('cover_heading', '') for entry in self.content_history[-30:]])
-                current_request = f"{request}\n\nIMPORTANT: Previous attempt failed validation. " \
-                                 f"Please ensure you generate EXACTLY 3-8 content pages with titles under 35 characters and main_point under 350 characters. " \
-                                 f"Also generate completely different content with fresh topics and angles. " \
-                                 f"Avoid these topics: {prev_topics}"
+                # History only changes right before generate() returns, so build this once
+                if retry_request is None:
+                    prev_topics = ", ".join(entry.get('cover_heading', '') for entry in self.content_history[-30:])
+                    retry_request = f"{request}\n\nIMPORTANT: Previous attempt failed validation. " \
+                                    f"Please ensure you generate EXACTLY 3-8 content pages with titles under 35 characters and main_point under 350 characters. " \
+                                    f"Also generate completely different content with fresh topics and angles. " \
+                                    f"Avoid these topics: {prev_topics}"
+                current_request = retry_request
                 logger.info(f"Retry attempt {attempt} with validation requirements and duplicate avoidance")
             
             messages = [{"role": "user", "content": current_request}]
@@ -253,7 +263,6 @@ class ContentAgent:
                     # Handle if the content is a string (possibly JSON string)
                     if isinstance(message_content, str):
                         try:
-                            import json
                             content_json = json.loads(message_content)
                         except json.JSONDecodeError:
                             content_json = message_content
@@ -336,7 +345,6 @@ class ContentAgent:
                             content_json = raw_content
                         else:
                             # Try to parse as JSON string
-                            import json
                             if isinstance(raw_content, str):
                                 try:
                                     content_json = json.loads(raw_content)
@@ -484,8 +492,6 @@ class ContentAgent:
         Returns:
             Command to update state and route to next node
         """
-        from langgraph.types import Command
-        
         result = self.react_agent.invoke(state)    
         message_content = result["messages"][-1].content
         
@@ -496,7 +502,6 @@ class ContentAgent:
                 # Handle if the content is a string (possibly JSON string)
                 if isinstance(message_content, str):
                     try:
-                        import json
                         content_json = json.loads(message_content)
                     except json.JSONDecodeError:
                         content_json = message_content
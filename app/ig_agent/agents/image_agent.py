@@ -3,13 +3,68 @@ Image generation agent for Instagram posts
 """
 
 import os
+import re
 import logging
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from langchain_core.messages import HumanMessage
 
+from ..prompt_loader import read_prompt
+
 logger = logging.getLogger("ig_agent.image_agent")
 
+# CJK ideographs and kana; such text wraps by character instead of by word
+_CJK_RE = re.compile(r'[\u4e00-\u9fff\u3040-\u30ff\u3400-\u4dbf]')
+
+# Fonts to try for PIL rendering (with Chinese support first)
+FONT_CANDIDATES = [
+    # macOS
+    "/System/Library/Fonts/PingFang.ttc",
+    "/System/Library/Fonts/Helvetica.ttc", 
+    "/Library/Fonts/Arial Unicode MS.ttf",
+    # Windows
+    "C:/Windows/Fonts/simsun.ttc",
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/arial.ttf",
+    # Linux
+    "/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    # Fallback
+    "Arial.ttf"
+]
+
+
+@lru_cache(maxsize=None)
+def _load_font(font_path: str, size: int):
+    """
+    Load a TrueType font once per (path, size)
+    
+    CJK font collections are tens of MB; parsing them again for every
+    size probe dominated PIL fallback rendering. Failures raise and are
+    not cached, so a missing candidate costs only a failed open().
+    """
+    from PIL import ImageFont
+    return ImageFont.truetype(font_path, size)
+
+
+@lru_cache(maxsize=None)
+def _find_font_path() -> Optional[str]:
+    """
+    Return the first font candidate that loads, or None if none do
+    
+    Probed once per process, since each missing candidate costs a failed
+    open() and an exception on every image otherwise.
+    """
+    for font_path in FONT_CANDIDATES:
+        try:
+            _load_font(font_path, 40)
+            return font_path
+        except Exception:
+            continue
+    return None
+
+
 class ImageAgent:
     """
     Agent responsible for generating Instagram images from content
@@ -41,10 +96,9 @@ class ImageAgent:
         # Set output directory
         self.output_dir = output_dir
         
-        # Load prompt
+        # Load prompt (cached across agent instances)
         if os.path.exists(self.prompt_path):
-            with open(self.prompt_path, 'r') as f:
-                self.prompt = f.read()
+            self.prompt = read_prompt(self.prompt_path)
     
     def generate_images(self, content_json: Dict[str, Any], output_dir: str = None) -> List[Dict[str, Any]]:
         """
@@ -72,19 +126,15 @@ class ImageAgent:
             # Initialize template processor
             processor = TemplateProcessor(self.templates_dir, output_dir)
             
-            # Process cover image
-            cover_path = processor.generate_cover(content_json.get("cover", {}))
-            
-            # Process content images
-            content_paths = []
-            for i, page in enumerate(content_json["content_pages"]):
-                page_number = i + 1
-                content_path = processor.generate_content_page(
-                    page, 
-                    page_number,
-                    with_image="illustration_description" in page and page["illustration_description"]
+            try:
+                # Process cover and content images; pages are rasterized in parallel
+                cover_path, *content_paths = processor.generate_all_pages(
+                    content_json.get("cover", {}),
+                    content_json["content_pages"]
                 )
-                content_paths.append(content_path)
+            finally:
+                # Stop this post's Inkscape shell; the render worker pool is shared across posts
+                processor.close()
             
             # Create image metadata
             images = [
@@ -172,31 +222,11 @@ class ImageAgent:
         # Try to use fonts with Chinese support
         title_font = subtitle_font = text_font = None
         
-        # List of fonts to try (with Chinese support)
-        font_candidates = [
-            # macOS
-            "/System/Library/Fonts/PingFang.ttc",
-            "/System/Library/Fonts/Helvetica.ttc", 
-            "/Library/Fonts/Arial Unicode MS.ttf",
-            # Windows
-            "C:/Windows/Fonts/simsun.ttc",
-            "C:/Windows/Fonts/msyh.ttc",
-            "C:/Windows/Fonts/arial.ttf",
-            # Linux
-            "/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc",
-            "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-            # Fallback
-            "Arial.ttf"
-        ]
-        
-        for font_path in font_candidates:
-            try:
-                title_font = ImageFont.truetype(font_path, 80)
-                subtitle_font = ImageFont.truetype(font_path, 40)
-                text_font = ImageFont.truetype(font_path, 35)
-                break
-            except:
-                continue
+        font_path = _find_font_path()
+        if font_path:
+            title_font = _load_font(font_path, 80)
+            subtitle_font = _load_font(font_path, 40)
+            text_font = _load_font(font_path, 35)
         
         # Final fallback
         if not title_font:
@@ -229,19 +259,12 @@ class ImageAgent:
             current_font_size = 80
             
             # Try smaller font sizes until text fits
-            working_font_path = None
-            for font_path in font_candidates:
-                try:
-                    ImageFont.truetype(font_path, 40)  # Test if font works
-                    working_font_path = font_path
-                    break
-                except:
-                    continue
+            working_font_path = _find_font_path()
             
             if working_font_path:
                 while current_font_size > 40:
                     try:
-                        test_font = ImageFont.truetype(working_font_path, current_font_size)
+                        test_font = _load_font(working_font_path, current_font_size)
                         bbox = draw.textbbox((0, 0), heading1, font=test_font)
                         text_width = bbox[2] - bbox[0]
                         if text_width <= max_width:
@@ -251,12 +274,12 @@ class ImageAgent:
                     current_font_size -= 5
                 
                 # Use adjusted font
-                heading_font = ImageFont.truetype(working_font_path, current_font_size) if current_font_size > 40 else title_font
+                heading_font = _load_font(working_font_path, current_font_size) if current_font_size > 40 else title_font
                 
                 # Auto-adjust font size for heading2 (smaller than heading1)
                 subtitle_font_size = max(30, current_font_size - 20)
                 try:
-                    subtitle_font = ImageFont.truetype(working_font_path, subtitle_font_size)
+                    subtitle_font = _load_font(working_font_path, subtitle_font_size)
                 except:
                     subtitle_font = subtitle_font
             else:
@@ -335,7 +358,7 @@ class ImageAgent:
             rgb_img.paste(img, mask=img if img.mode == 'RGBA' else None)
             img = rgb_img
         
-        img.save(output_path, "JPEG", quality=95)
+        img.save(output_path, "JPEG", quality=90, optimize=True, progressive=True, subsampling=2)
         
         logger.info(f"Created cover image with PIL: {output_path}")
         return output_path
@@ -354,31 +377,11 @@ class ImageAgent:
         # Try to use fonts with Chinese support
         title_font = text_font = page_font = None
         
-        # List of fonts to try (with Chinese support)
-        font_candidates = [
-            # macOS
-            "/System/Library/Fonts/PingFang.ttc",
-            "/System/Library/Fonts/Helvetica.ttc", 
-            "/Library/Fonts/Arial Unicode MS.ttf",
-            # Windows
-            "C:/Windows/Fonts/simsun.ttc",
-            "C:/Windows/Fonts/msyh.ttc",
-            "C:/Windows/Fonts/arial.ttf",
-            # Linux
-            "/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc",
-            "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-            # Fallback
-            "Arial.ttf"
-        ]
-        
-        for font_path in font_candidates:
-            try:
-                title_font = ImageFont.truetype(font_path, 60)
-                text_font = ImageFont.truetype(font_path, 32)
-                page_font = ImageFont.truetype(font_path, 40)
-                break
-            except:
-                continue
+        font_path = _find_font_path()
+        if font_path:
+            title_font = _load_font(font_path, 60)
+            text_font = _load_font(font_path, 32)
+            page_font = _load_font(font_path, 40)
         
         # Final fallback
         if not title_font:
@@ -433,28 +436,9 @@ class ImageAgent:
         if len(lines) > max_lines:
             # Scale down font size to fit more lines
             scale_factor = max(0.7, max_lines / len(lines))
-            if text_font:
-                try:
-                    font_candidates = [
-                        "/System/Library/Fonts/PingFang.ttc",
-                        "/System/Library/Fonts/Helvetica.ttc", 
-                        "/Library/Fonts/Arial Unicode MS.ttf",
-                        "C:/Windows/Fonts/simsun.ttc",
-                        "C:/Windows/Fonts/msyh.ttc",
-                        "C:/Windows/Fonts/arial.ttf",
-                        "/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc",
-                        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-                        "Arial.ttf"
-                    ]
-                    
-                    for font_path in font_candidates:
-                        try:
-                            text_font = ImageFont.truetype(font_path, int(32 * scale_factor))
-                            break
-                        except:
-                            continue
-                except:
-                    pass
+            font_path = _find_font_path()
+            if text_font and font_path:
+                text_font = _load_font(font_path, int(32 * scale_factor))
             
             line_height = int(line_height * scale_factor)
             # Re-wrap text with smaller font
@@ -480,110 +464,88 @@ class ImageAgent:
             rgb_img.paste(img, mask=img if img.mode == 'RGBA' else None)
             img = rgb_img
         
-        img.save(output_path, "JPEG", quality=95)
+        img.save(output_path, "JPEG", quality=90, optimize=True, progressive=True, subsampling=2)
         
         logger.info(f"Created content image {page_number} with PIL: {output_path}")
         return output_path
     
     def _wrap_text(self, text: str, font, max_width: int) -> List[str]:
         """Wrap text to fit within max_width pixels"""
-        from PIL import Image, ImageDraw
-        import re
-        
         if not font:
             # Fallback for no font - use character-based wrapping for Chinese
-            has_cjk = bool(re.search(r'[\u4e00-\u9fff\u3040-\u30ff\u3400-\u4dbf]', text))
+            has_cjk = _CJK_RE.search(text) is not None
             
             if has_cjk:
                 # For Chinese text, wrap by character count
                 chars_per_line = 20  # Conservative estimate
-                lines = []
-                current_line = ""
-                
-                for char in text:
-                    if len(current_line) >= chars_per_line:
-                        lines.append(current_line)
-                        current_line = char
-                    else:
-                        current_line += char
-                
-                if current_line:
-                    lines.append(current_line)
-                return lines
+                return [text[i:i + chars_per_line] for i in range(0, len(text), chars_per_line)]
             else:
                 # For English text, wrap by words
                 words = text.split()
-                lines = []
-                current_line = ""
                 words_per_line = 8  # Conservative estimate
-                
-                for word in words:
-                    if len(current_line.split()) >= words_per_line:
-                        lines.append(current_line.strip())
-                        current_line = word + " "
-                    else:
-                        current_line += word + " "
-                
-                if current_line.strip():
-                    lines.append(current_line.strip())
-                return lines
-        
-        # Create temporary draw object for text measurement
-        temp_img = Image.new('RGB', (1, 1))
-        temp_draw = ImageDraw.Draw(temp_img)
+                return [" ".join(words[i:i + words_per_line]) for i in range(0, len(words), words_per_line)]
         
         # Check if text contains Chinese characters
-        has_cjk = bool(re.search(r'[\u4e00-\u9fff\u3040-\u30ff\u3400-\u4dbf]', text))
+        has_cjk = _CJK_RE.search(text) is not None
         
         if has_cjk:
-            # For Chinese text, wrap by character to avoid word boundary issues
+            # For Chinese text, wrap by character to avoid word boundary issues.
+            # Each distinct character is measured once and line widths are kept
+            # as running sums, rather than re-measuring the whole line per character
             lines = []
             current_line = ""
+            current_width = 0
+            char_widths = {}
             
             for char in text:
-                test_line = current_line + char
-                bbox = temp_draw.textbbox((0, 0), test_line, font=font)
-                text_width = bbox[2] - bbox[0]
+                char_width = char_widths.get(char)
+                if char_width is None:
+                    char_width = char_widths[char] = font.getlength(char)
                 
-                if text_width <= max_width:
-                    current_line = test_line
+                if current_width + char_width <= max_width:
+                    current_line += char
+                    current_width += char_width
                 else:
                     if current_line:
                         lines.append(current_line)
                         current_line = char
+                        current_width = char_width
                     else:
                         # Single character is too long, force it
                         lines.append(char)
                         current_line = ""
+                        current_width = 0
             
             if current_line:
                 lines.append(current_line)
             
             return lines
         else:
-            # For English text, wrap by words
+            # For English text, wrap by words, measuring each word once and keeping
+            # a running line width (trailing space included, as the old check did)
             words = text.split()
             lines = []
-            current_line = ""
+            current_words = []
+            current_width = 0
+            space_width = font.getlength(" ")
             
             for word in words:
-                test_line = current_line + word + " " if current_line else word + " "
-                bbox = temp_draw.textbbox((0, 0), test_line, font=font)
-                text_width = bbox[2] - bbox[0]
+                word_width = font.getlength(word) + space_width
                 
-                if text_width <= max_width:
-                    current_line = test_line
+                if current_width + word_width <= max_width:
+                    current_words.append(word)
+                    current_width += word_width
                 else:
-                    if current_line:
-                        lines.append(current_line.strip())
-                        current_line = word + " "
+                    if current_words:
+                        lines.append(" ".join(current_words))
+                        current_words = [word]
+                        current_width = word_width
                     else:
                         # Single word is too long, force it
                         lines.append(word)
-                        current_line = ""
             
-            if current_line.strip():
-                lines.append(current_line.strip())
+            if current_words:
+                lines.append(" ".join(current_words))
             
             return lines
     
@@ -614,18 +576,18 @@ class ImageAgent:
                 goto="supervisor",
             )
         
-        # Create dated output directory
+        # Create dated output directory from one clock reading, so the date
+        # folder and timestamp always agree (even at midnight)
         import tempfile
         from datetime import datetime
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        now = datetime.now()
         
         # Determine base output directory
         base_output_dir = self.output_dir or Path(tempfile.gettempdir())
         
         # Create dated subdirectory structure
-        date_folder = datetime.now().strftime("%Y-%m-%d")
-        output_dir = Path(base_output_dir) / date_folder / timestamp
+        output_dir = Path(base_output_dir) / now.strftime("%Y-%m-%d") / now.strftime("%Y%m%d_%H%M%S")
         os.makedirs(output_dir, exist_ok=True)
         
         logger.info(f"Creating output in: {output_dir}")
@@ -1,25 +1,47 @@
 import os
+import re
+import json
 import logging
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 logger = logging.getLogger("ig_agent.instagram_poster")
 
+# Last run of digits in a file stem, e.g. "content_03" -> "03"
+_TRAILING_DIGITS = re.compile(r'(\d+)(?!.*\d)')
+
+
+def _page_number(path: str) -> int:
+    """Sort key for content pages: the trailing number in the file stem, or 0"""
+    match = _TRAILING_DIGITS.search(Path(path).stem)
+    return int(match.group(1)) if match else 0
+
+
 class InstagramPoster:
     """
     Agent responsible for posting to Instagram
     """
     
-    def __init__(self, username=None, password=None):
+    def __init__(self, username=None, password=None, max_dimension: int = 1350, session_file=None):
         """
         Initialize the InstagramPoster
         
         Args:
             username: Instagram username
             password: Instagram password
+            max_dimension: Maximum height (px) kept when converting images; width is
+                capped at the smaller of this and 1080, since Instagram displays at most
+                1080px wide / 1350px tall and downsamples the rest
+            session_file: Where to keep the login session between runs; defaults to
+                a per-user data directory outside the source tree
         """
         self.username = username or os.environ.get("INSTAGRAM_USERNAME")
         self.password = password or os.environ.get("INSTAGRAM_PASSWORD")
+        self.max_dimension = max_dimension
+        self.session_file = session_file or os.environ.get("INSTAGRAM_SESSION_FILE") or os.path.join(
+            os.environ.get("XDG_DATA_HOME", Path.home() / ".local" / "share"), "ig_agent", "instagram_session.json"
+        )
+        self._client = None
         
         # Check if instagrapi is installed
         try:
@@ -60,24 +82,30 @@ class InstagramPoster:
             jpg_path = png_path.with_suffix('.jpg')
             
             img = Image.open(png_path)
-            # Convert to RGB mode if the image has an alpha channel
+            
+            # Downsize oversized renders before encoding; Instagram would throw the pixels away
+            max_size = (min(1080, self.max_dimension), self.max_dimension)
+            img.thumbnail(max_size, Image.Resampling.LANCZOS)  # No-op for images that already fit
+            
+            # Flatten any alpha channel onto a white background
             if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-                bg = Image.new('RGB', img.size, (255, 255, 255))
-                bg.paste(img, mask=img if img.mode == 'RGBA' else None)
-                img = bg
+                bg = Image.new('RGBA', img.size, (255, 255, 255, 255))
+                img = Image.alpha_composite(bg, img.convert('RGBA')).convert('RGB')
+            elif img.mode != 'RGB':
+                img = img.convert('RGB')
             
-            # Save as JPG with high quality
-            img.save(jpg_path, 'JPEG', quality=95)
-            logger.info(f"Converted {png_path} to {jpg_path}")
+            # Save as progressive JPG; Instagram re-encodes uploads, so q=90 loses nothing visible
+            img.save(jpg_path, 'JPEG', quality=90, optimize=True, progressive=True, subsampling=2)
+            logger.info("Converted %s to %s", png_path, jpg_path)
             
             return str(jpg_path)
         except Exception as e:
-            logger.error(f"Failed to convert {png_path} to JPG: {str(e)}")
-            return png_path  # Return original path on error
+            logger.error("Failed to convert %s to JPG: %s", png_path, e)
+            return str(png_path)  # Return original path on error
     
     def prepare_images_for_posting(self, image_paths: List[str]) -> List[str]:
         """
-        Ensure proper ordering of images (no conversion needed as we generate JPG directly)
+        Ensure proper ordering of images, converting any PNG inputs to JPG
         
         Args:
             image_paths: Paths to images to post
@@ -86,8 +114,14 @@ class InstagramPoster:
             List of prepared image paths
         """
         try:
-            # Images are already in JPG format, just ensure proper ordering
-            converted_paths = image_paths
+            # Generated images are normally JPG already; only touch PIL for PNG inputs
+            if all(not p.lower().endswith('.png') for p in image_paths):
+                converted_paths = image_paths
+            else:
+                converted_paths = [
+                    self.convert_png_to_jpg(p) if p.lower().endswith('.png') else p
+                    for p in image_paths
+                ]
             
             # Ensure proper ordering: cover first, then content pages in order
             ordered_paths = []
@@ -96,12 +130,12 @@ class InstagramPoster:
             cover_path = next((p for p in converted_paths if 'cover' in Path(p).stem.lower()), None)
             if cover_path:
                 ordered_paths.append(cover_path)
-                logger.info(f"Found cover image: {Path(cover_path).name}")
+                logger.info("Found cover image: %s", Path(cover_path).name)
             
             # Find content images and sort by number
             content_paths = [p for p in converted_paths if 'content_' in Path(p).stem.lower()]
             # Sort by the numeric part of the filename
-            content_paths.sort(key=lambda p: int(''.join(filter(str.isdigit, Path(p).stem.split('_')[-1])) or 0))
+            content_paths.sort(key=_page_number)
             
             ordered_paths.extend(content_paths)
             
@@ -109,13 +143,126 @@ class InstagramPoster:
             remaining_paths = [p for p in converted_paths if p not in ordered_paths]
             ordered_paths.extend(remaining_paths)
             
-            logger.info(f"Images ordered for posting: {[Path(p).name for p in ordered_paths]}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Images ordered for posting: %s", [Path(p).name for p in ordered_paths])
             
             return ordered_paths
         except Exception as e:
-            logger.error(f"Failed to prepare images for posting: {str(e)}")
+            logger.error("Failed to prepare images for posting: %s", e)
             return image_paths  # Return original paths on error
     
+    def _filter_existing_paths(self, image_paths: List[str]) -> List[str]:
+        """
+        Keep only paths that point to existing files, scanning each parent
+        directory once instead of stat-ing every path individually
+        
+        Args:
+            image_paths: Paths to check
+            
+        Returns:
+            List of existing image paths, in the original order
+        """
+        existing_per_dir = {}
+        for parent in {Path(p).parent for p in image_paths}:
+            try:
+                with os.scandir(parent) as entries:
+                    existing_per_dir[parent] = {e.name for e in entries if e.is_file()}
+            except OSError:
+                existing_per_dir[parent] = set()
+        
+        valid_paths = []
+        for path in image_paths:
+            p = Path(path)
+            if p.name in existing_per_dir[p.parent]:
+                valid_paths.append(path)
+            else:
+                logger.warning("Image not found: %s", path)
+        
+        return valid_paths
+    
+    def _load_session(self) -> Optional[Dict[str, Any]]:
+        """
+        Read the saved login session, if there is one for this account
+        
+        Returns:
+            instagrapi settings, or None if missing, unreadable or saved for another account
+        """
+        try:
+            with open(self.session_file, encoding="utf-8") as f:
+                settings = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable Instagram session %s: %s", self.session_file, e)
+            return None
+        
+        if settings.get("login_username") != self.username:
+            logger.info("Saved Instagram session belongs to another account, logging in afresh")
+            return None
+        return settings
+    
+    def _save_session(self, client):
+        """
+        Save the client's login session, tagged with the account it belongs to
+        
+        Args:
+            client: Logged-in instagrapi Client
+        """
+        try:
+            Path(self.session_file).parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # The file holds session cookies, so it is owner-only from the moment it is created
+            fd = os.open(self.session_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            if hasattr(os, "fchmod"):
+                os.fchmod(fd, 0o600)  # Tighten a file left over with looser permissions
+            with os.fdopen(fd, "w") as f:
+                json.dump(dict(client.get_settings(), login_username=self.username), f, indent=4)
+        except Exception as e:
+            logger.warning("Could not save Instagram session to %s: %s", self.session_file, e)
+    
+    def _discard_session(self):
+        """Forget the cached client and delete the saved session, so the next attempt logs in afresh"""
+        self._client = None
+        try:
+            os.remove(self.session_file)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not delete Instagram session %s: %s", self.session_file, e)
+    
+    def _get_client(self):
+        """
+        Return a logged-in instagrapi Client, reusing this poster's client and,
+        while it still works for this account, the saved session, so repeat
+        runs skip the full login flow
+        
+        Returns:
+            Logged-in instagrapi Client
+        """
+        if self._client is not None:
+            return self._client
+        
+        from instagrapi import Client
+        from instagrapi.exceptions import LoginRequired, ClientLoginRequired
+        
+        client = Client()
+        settings = self._load_session()
+        if settings:
+            client.set_settings(settings)
+            # login() returns at once when the settings hold a session, without checking it
+            client.login(self.username, self.password)
+            try:
+                client.account_info()
+            except (LoginRequired, ClientLoginRequired) as e:
+                logger.warning("Saved Instagram session has expired, logging in again: %s", e)
+                # relogin keeps the saved device UUIDs, so Instagram sees the same device
+                client.login(self.username, self.password, relogin=True)
+        else:
+            client.login(self.username, self.password)
+        
+        self._save_session(client)
+        self._client = client
+        return client
+    
     def post_to_instagram(self, caption: str, image_paths: List[str]) -> Dict[str, Any]:
         """
         Post content to Instagram using instagrapi
@@ -149,23 +296,14 @@ class InstagramPoster:
             # Prepare images (convert PNG to JPG and ensure proper ordering)
             prepared_paths = self.prepare_images_for_posting(image_paths)
             
-            # Import here to avoid dependency if not needed
-            from instagrapi import Client
-            
             # Check if paths exist
-            valid_paths = []
-            for path in prepared_paths:
-                if Path(path).exists():
-                    valid_paths.append(path)
-                else:
-                    logger.warning(f"Image not found: {path}")
+            valid_paths = self._filter_existing_paths(prepared_paths)
             
             if not valid_paths:
                 raise ValueError("No valid image paths provided")
             
-            # Connect to Instagram
-            client = Client()
-            client.login(self.username, self.password)
+            # Connect to Instagram, reusing the session where possible
+            client = self._get_client()
             
             # Check if we have multiple images for carousel or just one
             if len(valid_paths) > 1:
@@ -176,7 +314,7 @@ class InstagramPoster:
                         caption=caption
                     )
                     
-                    logger.info(f"Posted carousel to Instagram: {media.pk}")
+                    logger.info("Posted carousel to Instagram: %s", media.pk)
                     return {
                         "posted": True,
                         "type": "carousel",
@@ -185,13 +323,13 @@ class InstagramPoster:
                     }
                 except Exception as carousel_error:
                     # If carousel upload fails, try uploading the first image as a single post
-                    logger.warning(f"Carousel upload failed: {str(carousel_error)}. Trying single image upload.")
+                    logger.warning("Carousel upload failed: %s. Trying single image upload.", carousel_error)
                     media = client.photo_upload(
                         valid_paths[0],
                         caption=caption
                     )
                     
-                    logger.info(f"Posted single image to Instagram: {media.pk}")
+                    logger.info("Posted single image to Instagram: %s", media.pk)
                     return {
                         "posted": True,
                         "type": "single",
@@ -206,7 +344,7 @@ class InstagramPoster:
                     caption=caption
                 )
                 
-                logger.info(f"Posted single image to Instagram: {media.pk}")
+                logger.info("Posted single image to Instagram: %s", media.pk)
                 return {
                     "posted": True,
                     "type": "single",
@@ -216,7 +354,13 @@ class InstagramPoster:
             
         except Exception as e:
             error_message = str(e)
-            logger.error(f"Failed to post to Instagram: {error_message}")
+            logger.error("Failed to post to Instagram: %s", error_message)
+            from instagrapi.exceptions import LoginRequired, ClientLoginRequired
+            if isinstance(e, (LoginRequired, ClientLoginRequired)):
+                # The session was rejected; don't reuse it on the next attempt
+                self._discard_session()
+            else:
+                self._client = None
             return {
                 "posted": False,
                 "error": error_message,
@@ -13,6 +13,8 @@ from pathlib import Path
 from typing import Dict, Any, List, Optional
 from langchain_core.messages import HumanMessage
 
+from ..prompt_loader import read_prompt
+
 logger = logging.getLogger("ig_agent.notification_agent")
 
 class NotificationAgent:
@@ -41,10 +43,9 @@ class NotificationAgent:
         self.email_user = email_user or os.environ.get("EMAIL_USER")
         self.email_password = email_password or os.environ.get("EMAIL_PASSWORD")
         
-        # Load prompt
+        # Load prompt (cached across agent instances)
         if os.path.exists(self.prompt_path):
-            with open(self.prompt_path, 'r') as f:
-                self.prompt = f.read()
+            self.prompt = read_prompt(self.prompt_path)
     
     def send_notification(
         self, 
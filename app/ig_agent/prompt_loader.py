@@ -0,0 +1,28 @@
+"""
+Prompt file loading shared by the agents
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+
+@lru_cache(maxsize=128)
+def _read_prompt(path: str) -> str:
+    return Path(path).read_text(encoding='utf-8')
+
+
+def read_prompt(prompt_path) -> str:
+    """
+    Read a prompt file once per process
+    
+    Agents are built for every workflow run, but prompts ship with the package
+    and don't change while the app runs, so they all share one cached copy.
+    Clear with _read_prompt.cache_clear() after editing a prompt.
+    
+    Args:
+        prompt_path: Path to prompt file
+        
+    Returns:
+        Prompt content
+    """
+    return _read_prompt(str(Path(prompt_path).resolve()))
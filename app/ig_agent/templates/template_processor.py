@@ -2,29 +2,566 @@
 Template processor for SVG templates
 """
 
+import io
 import os
+import re
+import time
+import atexit
+import select
+import shutil
+import hashlib
 import logging
+import multiprocessing
+import tempfile
+import threading
+import subprocess
+import unicodedata
 import cairosvg
+from PIL import Image, ImageDraw
+from string import Template
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    # Optional: lossless re-optimization of Pillow's JPEG output
+    import mozjpeg_lossless_optimization
+except ImportError:
+    mozjpeg_lossless_optimization = None
+
+try:
+    # Optional: in-process resvg rasterizer, much faster than spawning a converter
+    import resvg_py
+except ImportError:
+    resvg_py = None
 
 logger = logging.getLogger("ig_agent.template_processor")
 
+if hasattr(cairosvg, '__version__'):
+    logger.info("CairoSVG version: %s", cairosvg.__version__)
+
+# Chinese fonts prepended to every text element's font-family list
+CJK_FONT_FAMILIES = ("Songti SC", "PingFang SC", "Heiti SC", "STKaiti", "Kaiti SC",
+                     "SimSong", "Noto Sans CJK SC", "Arial Unicode MS")
+CJK_FONTS = ", ".join(CJK_FONT_FAMILIES)
+# Any of these in a tag means Chinese fonts were already added
+_CJK_FONT_MARKERS = ('PingFang', 'Heiti', 'Noto Sans CJK', 'Arial Unicode')
+
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="no"?>'
+_XML_DECL_RE = re.compile(r'<\?xml[^>]*\?>')
+_SVG_OPEN_RE = re.compile(r'(<svg[^>]*>)')
+_TEXT_TAG_RE = re.compile(r'<text[^>]*>')
+_FONT_FAMILY_RE = re.compile(r'font-family="([^"]*)"')
+# One-pass XML escaping for text substituted into templates
+_XML_ESCAPE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'})
+# Authoring-only parts of the templates, dropped before rendering
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+_INTER_TAG_WS_RE = re.compile(r'>\s*\n\s*<')
+
+# Embedded font definitions inserted after the SVG opening tag
+_FONT_FACE_STYLE = '\n<style type="text/css">\n' + "".join(
+    f"@font-face {{\n"
+    f"  font-family: '{family}';\n"
+    f"  src: local('{family}');\n"
+    f"  font-weight: normal;\n"
+    f"  font-style: normal;\n"
+    f"}}\n"
+    for family in ("Songti SC", "PingFang SC", "Heiti SC", "Kaiti SC")
+) + '</style>\n'
+
+
+class _TextBox(NamedTuple):
+    """Area a wrapped text field is laid out in, matching the old HTML boxes"""
+    x: float
+    y: float
+    width: float
+    height: float
+    font_size: float
+    line_height: float        # Multiple of font_size
+    padding: float = 0
+    centered: bool = False    # Centre horizontally and vertically, without clipping
+
+
+# SVG text does not wrap, and resvg/librsvg/CairoSVG do not render HTML
+# <foreignObject>, so multi-line fields are broken into <tspan> lines here.
+# Each such <text> element declares its box as data-box="x y width height".
+_TEXT_BOX_TAG_RE = re.compile(r'<text id="(\w+)"[^>]*\bdata-box="[^"]*"[^>]*>')
+_ATTR_RE = re.compile(r'([\w-]+)="([^"]*)"')
+
+
+def _parse_text_boxes(svg_content: str) -> Dict[str, _TextBox]:
+    """
+    Read the layout of every wrapped text field from a template
+    
+    Args:
+        svg_content: Template SVG content
+        
+    Returns:
+        Text box per element id
+    """
+    boxes = {}
+    for match in _TEXT_BOX_TAG_RE.finditer(svg_content):
+        attrs = dict(_ATTR_RE.findall(match.group(0)))
+        x, y, width, height = (float(v) for v in attrs['data-box'].split())
+        boxes[match.group(1)] = _TextBox(
+            x, y, width, height,
+            font_size=float(attrs['font-size']),
+            line_height=float(attrs.get('data-line-height', 1.2)),
+            padding=float(attrs.get('data-padding', 0)),
+            centered=attrs.get('text-anchor') == 'middle'
+        )
+    return boxes
+
+# Whitespace runs, unbreakable non-CJK words, or any other single character
+_WRAP_TOKEN_RE = re.compile(r'\s+|[^\s\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]+|.')
+# Punctuation that must not start a line; it may hang past the right edge instead
+_NO_LINE_START = frozenset('，。！？、；：）」』】》〉”’')
+
+
+def _char_width(char: str) -> float:
+    """Approximate advance width of a character, in ems"""
+    if unicodedata.east_asian_width(char) in ('W', 'F'):
+        return 1.0
+    return 0.3 if char.isspace() else 0.62
+
+
+def _wrap_svg_text(text: str, max_width: float, font_size: float) -> List[str]:
+    """
+    Greedily wrap text to max_width pixels: CJK text breaks between any two
+    characters, other words only at whitespace unless a word is too long
+    
+    Args:
+        text: Text to wrap, may contain explicit line breaks
+        max_width: Available line width in pixels
+        font_size: Font size in pixels
+        
+    Returns:
+        List of text lines
+    """
+    max_ems = max_width / font_size
+    lines = []
+    for paragraph in text.split('\n'):
+        line, width = [], 0.0
+        for token in _WRAP_TOKEN_RE.findall(paragraph):
+            token_width = sum(_char_width(c) for c in token)
+            if width + token_width <= max_ems:
+                line.append(token)
+                width += token_width
+            elif token.isspace():
+                # Break here; the whitespace itself is dropped
+                lines.append(''.join(line).rstrip())
+                line, width = [], 0.0
+            elif token in _NO_LINE_START and line:
+                line.append(token)
+                width += token_width
+            else:
+                if line:
+                    lines.append(''.join(line).rstrip())
+                    line, width = [], 0.0
+                # Split words that are wider than a whole line
+                for char in token:
+                    char_width = _char_width(char)
+                    if line and width + char_width > max_ems:
+                        lines.append(''.join(line))
+                        line, width = [], 0.0
+                    line.append(char)
+                    width += char_width
+        lines.append(''.join(line).rstrip())
+    return lines
+
+
+def _layout_text_box(text: str, box: _TextBox) -> str:
+    """
+    Lay out text in a box as SVG <tspan> lines
+    
+    Args:
+        text: Text to lay out
+        box: Area and font metrics to lay it out in
+        
+    Returns:
+        Escaped <tspan> elements to place inside the field's <text> element
+    """
+    inner_width = box.width - 2 * box.padding
+    inner_height = box.height - 2 * box.padding
+    line_height = box.font_size * box.line_height
+    lines = _wrap_svg_text(text, inner_width, box.font_size)
+    
+    if box.centered:
+        x = box.x + box.width / 2
+        top = box.y + (box.height - len(lines) * line_height) / 2
+    else:
+        x = box.x + box.padding
+        top = box.y + box.padding
+        # Clip overflowing text like the old overflow: hidden box, marking the cut
+        max_lines = max(1, int(inner_height // line_height))
+        if len(lines) > max_lines:
+            lines = lines[:max_lines]
+            lines[-1] = lines[-1][:-1] + '…'
+    
+    # Baseline sits half the leading plus the ascent below the top of each line box
+    baseline = top + (line_height - box.font_size) / 2 + 0.88 * box.font_size
+    return ''.join(
+        f'<tspan x="{x:g}" y="{baseline + i * line_height:.1f}">{line.translate(_XML_ESCAPE)}</tspan>'
+        for i, line in enumerate(lines)
+    )
+
+
+def _prepend_cjk_fonts(match) -> str:
+    return f'font-family="{CJK_FONTS}, {match.group(1)}"'
+
+
+def _add_cjk_fonts_to_text_tag(match) -> str:
+    """Make sure a <text> opening tag lists Chinese fonts first"""
+    tag = match.group(0)
+    if 'font-family' not in tag:
+        return f'{tag[:-1]} font-family="{CJK_FONTS}, Arial, sans-serif">'
+    if any(font in tag for font in _CJK_FONT_MARKERS):
+        return tag
+    return _FONT_FAMILY_RE.sub(_prepend_cjk_fonts, tag)
+
+
+_font_env_initialized = False
+
+
+def _init_font_env():
+    """
+    Set font-related environment variables for better Chinese support.
+    Runs once per process: repeated setenv calls are not thread-safe and
+    can invalidate environ pointers Pango has already cached.
+    """
+    global _font_env_initialized
+    if _font_env_initialized:
+        return
+    _font_env_initialized = True
+    
+    # Mac OS specific paths for Chinese fonts; values the user already set win
+    for name, value in (
+        ('PANGOCAIRO_FONT', 'PingFang SC,Heiti SC,Arial Unicode MS,SimSun,Noto Sans CJK SC,Arial'),
+        ('FONTCONFIG_PATH', '/System/Library/Fonts:/Library/Fonts:/System/Library/Fonts/Supplemental:/usr/share/fonts'),
+        ('PANGO_LANGUAGE', 'zh-CN,zh-TW,zh-HK'),
+        ('LANG', 'zh_CN.UTF-8'),
+        ('LC_ALL', 'zh_CN.UTF-8'),
+    ):
+        os.environ.setdefault(name, value)
+    
+    # Use FC_DEBUG for font matching troubleshooting
+    # Uncomment to debug font issues
+    # os.environ['FC_DEBUG'] = '4'
+
+
+_init_font_env()
+
+
+_fontconfig_warmed = False
+
+
+def _run_fc_cache():
+    try:
+        subprocess.run(['fc-cache'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       check=False, timeout=60)
+    except Exception as e:
+        logger.warning("Could not warm fontconfig cache: %s", e)
+
+
+def _warm_fontconfig_cache():
+    """
+    Build any missing fontconfig caches once per process, in the background,
+    so later rsvg-convert/Inkscape spawns load cached font lists instead of
+    rescanning the font directories
+    """
+    global _fontconfig_warmed
+    if _fontconfig_warmed:
+        return
+    _fontconfig_warmed = True
+    
+    if shutil.which('fc-cache'):
+        threading.Thread(target=_run_fc_cache, name="fc-cache", daemon=True).start()
+
+
+class _InkscapeShell:
+    """
+    Long-lived `inkscape --shell` process, so Inkscape startup and its
+    fontconfig scan are paid once per TemplateProcessor instead of per page
+    """
+    
+    PROMPT = b"> "
+    
+    def __init__(self, timeout: float = 60):
+        self.timeout = timeout
+        self.proc = subprocess.Popen(
+            ['inkscape', '--shell'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+        self._read_until_prompt()
+    
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+    
+    def _read_until_prompt(self) -> bytes:
+        """Read shell output until Inkscape is ready for the next command"""
+        output = b""
+        fd = self.proc.stdout.fileno()
+        while not output.endswith(self.PROMPT):
+            ready, _, _ = select.select([fd], [], [], self.timeout)
+            if not ready:
+                raise TimeoutError("Inkscape shell did not respond in time")
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                raise RuntimeError("Inkscape shell exited unexpectedly")
+            output += chunk
+        return output
+    
+    def convert(self, svg_path, dpi: int = 300) -> bytes:
+        """
+        Export an SVG file to PNG through the running shell
+        
+        Args:
+            svg_path: Path to SVG file
+            dpi: Export resolution
+            
+        Returns:
+            PNG data
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            png_path = os.path.join(temp_dir, "export.png")
+            command = (
+                f"file-open:{svg_path}; export-type:png; export-dpi:{dpi}; "
+                f"export-filename:{png_path}; export-do; file-close\n"
+            )
+            self.proc.stdin.write(command.encode("utf-8"))
+            self._read_until_prompt()
+            with open(png_path, "rb") as f:
+                return f.read()
+    
+    def close(self):
+        if not self.alive():
+            return
+        try:
+            self.proc.stdin.write(b"quit\n")
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except Exception:
+            self.proc.kill()
+
+
+class _TempSVG:
+    """
+    SVG content that is only written to a temporary file once a
+    rasterizer actually needs a path
+    """
+    
+    def __init__(self, svg_bytes: bytes):
+        self.svg_bytes = svg_bytes
+        self._path = None
+    
+    @property
+    def path(self) -> str:
+        if self._path is None:
+            with tempfile.NamedTemporaryFile(suffix='.svg', delete=False) as f:
+                f.write(self.svg_bytes)
+            self._path = f.name
+        return self._path
+    
+    def cleanup(self):
+        if self._path is not None:
+            os.unlink(self._path)
+            self._path = None
+
+
+@lru_cache(maxsize=None)
+def _load_template(path: Path) -> Tuple[Template, Dict[str, _TextBox]]:
+    """
+    Read and parse a template once per process, with Chinese font support
+    already applied, so new TemplateProcessor instances (one per post, and
+    one per render worker) never re-read the static files
+    
+    Comments and indentation between tags are stripped, which shrinks every
+    page the rasterizers have to parse. The layout of wrapped text fields is
+    read here too, so pages never have to look it up.
+    """
+    svg_content = TemplateProcessor._ensure_chinese_font_support(path.read_text(encoding="utf-8"))
+    svg_content = _INTER_TAG_WS_RE.sub('><', _COMMENT_RE.sub('', svg_content))
+    return Template(svg_content), _parse_text_boxes(svg_content)
+
+
+@lru_cache(maxsize=32)
+def _error_image_jpg(description: str) -> bytes:
+    """
+    Draw and encode the fallback image for a failed render
+    
+    Cached per description, so a rasterizer outage that fails every page of
+    every post does not redraw and re-encode the same image each time.
+    """
+    img = Image.new('RGB', (1080, 1080), color='white')
+    draw = ImageDraw.Draw(img)
+    
+    # Add error text
+    draw.text((100, 500), f"Error converting SVG to PNG\n{description}", fill='black')
+    jpeg_data = io.BytesIO()
+    img.save(jpeg_data, 'JPEG')
+    return jpeg_data.getvalue()
+
+
+# JPEG encoder settings; part of the render cache key
+_JPEG_QUALITY = 90
+_JPEG_SUBSAMPLING = 2  # 4:2:0
+
+# Bounds for the on-disk render cache. Most pages are fresh LLM text that is
+# never rendered again, so only recently used renders are worth keeping
+_RENDER_CACHE_MAX_ENTRIES = 256
+_RENDER_CACHE_MAX_AGE = 7 * 24 * 3600
+
+
+def _prune_render_cache(cache_dir: Path):
+    """
+    Delete cached renders beyond the entry limit, least recently used first,
+    and any not used within the age limit
+    """
+    try:
+        with os.scandir(cache_dir) as entries:
+            renders = sorted(((e.stat().st_mtime, e.path) for e in entries if e.name.endswith('.jpg')),
+                             reverse=True)
+    except OSError:
+        return
+    
+    cutoff = time.time() - _RENDER_CACHE_MAX_AGE
+    for i, (mtime, path) in enumerate(renders):
+        if i >= _RENDER_CACHE_MAX_ENTRIES or mtime < cutoff:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Already removed by another worker
+
+
+# Upper bounds for the render worker pool: more workers than this stop paying
+# off for a single post, and each rasterizer process can take ~256MB
+_MAX_RENDER_WORKERS = 8
+_RENDER_WORKER_MEMORY = 256 * 1024 * 1024
+
+
+def _render_worker_count() -> int:
+    """
+    Number of render workers to use, limited by CPUs and, inside a
+    container, by the cgroup memory limit
+    """
+    workers = min(_MAX_RENDER_WORKERS, os.cpu_count() or 1)
+    try:
+        with open('/sys/fs/cgroup/memory.max') as f:
+            limit = f.read().strip()
+        if limit != 'max':
+            workers = min(workers, int(limit) // _RENDER_WORKER_MEMORY)
+    except (OSError, ValueError):
+        pass
+    return max(workers, 1)
+
+
+def _render_mp_context():
+    """
+    Start method for render workers. Never plain fork: forking a
+    multithreaded parent such as the Streamlit server can deadlock the child
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+# Per-process TemplateProcessor used by generate_all_pages workers, so each
+# worker keeps its own rasterizer state across the pages it renders
+_worker_processor = None
+
+
+def _init_render_worker(templates_dir: str, allow_inkscape: bool, cache_dir):
+    global _worker_processor, _fontconfig_warmed
+    # The parent already warmed the font cache; don't rerun fc-cache in every worker
+    _fontconfig_warmed = True
+    # Tasks carry their own output paths, so the worker's output_dir is unused
+    _worker_processor = TemplateProcessor(templates_dir, allow_inkscape=allow_inkscape, cache_dir=cache_dir)
+
+
+def _render_in_worker(task) -> bool:
+    svg_data, output_path, description = task
+    return _worker_processor._convert_svg_to_png(svg_data, output_path, description=description)
+
+
+# Render worker pool shared by every TemplateProcessor in this process. A new
+# processor is built for each post, so the pool lives here to keep its workers
+# and their warm rasterizers across posts; it is shut down at interpreter exit
+_render_pool = None
+_render_pool_config = None
+_render_pool_lock = threading.Lock()
+
+
+def _get_render_pool(templates_dir: str, allow_inkscape: bool, cache_dir) -> ProcessPoolExecutor:
+    """
+    Get the shared pool of render worker processes, starting it if needed
+    
+    Args:
+        templates_dir: Templates directory the workers load
+        allow_inkscape: Whether workers may fall back to Inkscape
+        cache_dir: Render cache directory the workers use
+        
+    Returns:
+        Process pool whose workers each hold their own TemplateProcessor
+    """
+    global _render_pool, _render_pool_config
+    config = (templates_dir, allow_inkscape, cache_dir)
+    with _render_pool_lock:
+        if _render_pool is not None and _render_pool_config != config:
+            # Workers were set up for other settings; let them finish queued pages and exit
+            _render_pool.shutdown(wait=False)
+            _render_pool = None
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=_render_worker_count(),
+                mp_context=_render_mp_context(),
+                initializer=_init_render_worker,
+                initargs=config
+            )
+            _render_pool_config = config
+        return _render_pool
+
+
+def _discard_render_pool(pool: ProcessPoolExecutor):
+    """Drop a pool that failed, so the next post starts fresh workers"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _shutdown_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        pool, _render_pool = _render_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
 class TemplateProcessor:
     """
     Processor for SVG templates
     """
     
-    def __init__(self, templates_dir=None, output_dir=None):
+    def __init__(self, templates_dir=None, output_dir=None, allow_inkscape: bool = True, cache_dir=None):
         """
         Initialize the TemplateProcessor
         
         Args:
             templates_dir: Directory containing SVG templates
             output_dir: Directory to save generated images
+            allow_inkscape: Whether to fall back to Inkscape when every other rasterizer fails
+            cache_dir: Directory for recently rendered pages, shared across posts
         """
         self.templates_dir = Path(templates_dir) if templates_dir else Path(__file__).parent.parent / "static"
         self.output_dir = Path(output_dir) if output_dir else Path.cwd()
+        self.cache_dir = (Path(cache_dir) if cache_dir else
+                          Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "ig_agent" / "renders")
         
         # Create output directory if it doesn't exist
         os.makedirs(self.output_dir, exist_ok=True)
@@ -36,216 +573,317 @@ class TemplateProcessor:
             "content_withoutimage": self.templates_dir / "content_withoutimage.svg"
         }
         
-        # Verify templates exist
+        # Look up the external rasterizers once rather than on every page
+        self.allow_inkscape = allow_inkscape
+        self._rsvg_convert = shutil.which('rsvg-convert')
+        self._inkscape = shutil.which('inkscape') if allow_inkscape else None
+        
+        # Render cache keys also cover the available rasterizers and encoder settings,
+        # so installing a better backend (or changing the encoding) invalidates old renders
+        self._cache_salt = repr((
+            getattr(resvg_py, '__version__', resvg_py is not None), self._rsvg_convert,
+            getattr(cairosvg, '__version__', None), self._inkscape,
+            mozjpeg_lossless_optimization is not None, _JPEG_QUALITY, _JPEG_SUBSAMPLING
+        )).encode('utf-8')
+        
+        # Persistent Inkscape worker, started on first use
+        self._inkscape_shell = None
+        self._inkscape_shell_failed = False
+        
+        # Parsed templates are shared process-wide; pages only substitute their ${placeholders}.
+        # Reading doubles as the existence check, with no separate stat calls
+        self._templates_src = {}
+        self._text_boxes = {}
         for name, path in self.templates.items():
-            if not path.exists():
-                logger.warning(f"Template not found: {path}")
-                
-        # Set default font for CairoSVG (if supported by your version)
-        try:
-            # Set multiple font-related environment variables for better Chinese support
-            # Mac OS specific paths for Chinese fonts
-            os.environ['PANGOCAIRO_FONT'] = 'PingFang SC,Heiti SC,Arial Unicode MS,SimSun,Noto Sans CJK SC,Arial'
-            os.environ['FONTCONFIG_PATH'] = '/System/Library/Fonts:/Library/Fonts:/System/Library/Fonts/Supplemental:/usr/share/fonts'
-            os.environ['PANGO_LANGUAGE'] = 'zh-CN,zh-TW,zh-HK'
-            os.environ['LANG'] = 'zh_CN.UTF-8'
-            os.environ['LC_ALL'] = 'zh_CN.UTF-8'
-            
-            # Use FC_DEBUG for font matching troubleshooting
-            # Uncomment to debug font issues
-            # os.environ['FC_DEBUG'] = '4'
-            
-            # Force CairoSVG to use system fonts
-            try:
-                import pycairo
-                logger.info("PyCairo is available")
-            except ImportError:
-                logger.warning("PyCairo is not available, falling back to other methods")
-                
             try:
-                import cairosvg
-                logger.info(f"CairoSVG version: {cairosvg.__version__}")
-            except (ImportError, AttributeError):
-                logger.warning("CairoSVG version info not available")
-                
-        except Exception as e:
-            logger.warning(f"Could not set font environment variables: {e}")
+                self._templates_src[name], self._text_boxes[name] = _load_template(path)
+            except FileNotFoundError:
+                logger.warning("Template not found: %s", path)
+        
+        # Let the rasterizer subprocesses start from a warm font cache
+        # (only needed when they are the preferred rasterizers; resvg does not use fontconfig)
+        if resvg_py is None and (self._rsvg_convert or self._inkscape):
+            _warm_fontconfig_cache()
     
-    def _convert_png_to_jpg(self, png_path: str, jpg_path: str):
-        """Convert PNG to JPG for Instagram compatibility"""
+    def _get_inkscape_shell(self) -> Optional[_InkscapeShell]:
+        """
+        Get the running Inkscape shell, starting it if needed
+        
+        Returns:
+            Live shell worker, or None if Inkscape is unavailable
+        """
+        if self._inkscape_shell and self._inkscape_shell.alive():
+            return self._inkscape_shell
+        if self._inkscape_shell_failed or not self._inkscape:
+            return None
+        
         try:
-            from PIL import Image
-            
-            img = Image.open(png_path)
-            # Convert to RGB mode if the image has an alpha channel
-            if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-                rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                rgb_img.paste(img, mask=img if img.mode == 'RGBA' else None)
-                img = rgb_img
-            
-            # Save as JPG with high quality
-            img.save(jpg_path, 'JPEG', quality=95)
-            
-            # Remove the PNG file
-            os.remove(png_path)
-            
-            logger.info(f"Converted {png_path} to {jpg_path}")
-            
+            self._inkscape_shell = _InkscapeShell()
+            return self._inkscape_shell
         except Exception as e:
-            logger.error(f"Failed to convert PNG to JPG: {e}")
-            # If conversion fails, try to rename PNG to JPG
-            try:
-                os.rename(png_path, jpg_path)
-            except:
-                pass
+            logger.warning("Could not start Inkscape shell: %s", e)
+            self._inkscape_shell_failed = True
+            return None
+    
+    def _close_inkscape_shell(self):
+        if self._inkscape_shell:
+            self._inkscape_shell.close()
+            self._inkscape_shell = None
+    
+    def close(self):
+        """Shut down the persistent Inkscape worker, if started; the shared render pool stays up"""
+        self._close_inkscape_shell()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
+    def _encode_png_as_jpg(self, png_bytes: bytes) -> bytes:
+        """
+        Decode in-memory PNG data and re-encode it as JPG for Instagram compatibility
+        
+        Args:
+            png_bytes: Rendered PNG data
             
-    def _convert_svg_to_png(self, svg_data, svg_path, output_path, description=""):
+        Returns:
+            JPG data
+        """
+        img = Image.open(io.BytesIO(png_bytes))
+        # Flatten any alpha channel onto a white background
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            bg = Image.new('RGBA', img.size, (255, 255, 255, 255))
+            img = Image.alpha_composite(bg, img.convert('RGBA')).convert('RGB')
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        
+        # Encode progressive 4:2:0 JPG in memory; Instagram re-encodes uploads, so q=90 loses nothing visible
+        jpeg_data = io.BytesIO()
+        img.save(jpeg_data, 'JPEG', quality=_JPEG_QUALITY, optimize=mozjpeg_lossless_optimization is None,
+                 progressive=True, subsampling=_JPEG_SUBSAMPLING)
+        jpeg_bytes = jpeg_data.getvalue()
+        if mozjpeg_lossless_optimization is not None:
+            jpeg_bytes = mozjpeg_lossless_optimization.optimize(jpeg_bytes)
+        return jpeg_bytes
+    
+    def _render_jpg(self, svg_data, description="") -> Optional[bytes]:
         """
-        Convert SVG to PNG using multiple methods
+        Rasterize SVG to in-memory JPG data
         
         Args:
             svg_data: SVG content as string
-            svg_path: Path to SVG file
-            output_path: Path to save PNG output
             description: Optional description for logging
             
         Returns:
-            bool: True if conversion succeeded, False otherwise
+            JPG data, or None if not even an error image could be created
         """
-        # Method 1: Try using librsvg via rsvg-convert subprocess first (best support for SVG features)
+        # Pages whose final SVG is unchanged since an earlier post come straight from the cache
+        svg_bytes = svg_data.encode('utf-8')
+        cache_key = hashlib.blake2b(self._cache_salt, digest_size=16)
+        cache_key.update(svg_bytes)
+        cache_path = self.cache_dir / f"{cache_key.hexdigest()}.jpg"
+        try:
+            jpeg_bytes = cache_path.read_bytes()
+            os.utime(cache_path)  # Mark as recently used so pruning keeps it
+            logger.info("Using cached render for %s", description)
+            return jpeg_bytes
+        except OSError:
+            pass
+        
+        temp_svg = _TempSVG(svg_bytes)
         try:
-            import subprocess
-            import tempfile
+            jpeg_bytes = self._rasterize_svg(svg_data, svg_bytes, temp_svg, description)
+        finally:
+            temp_svg.cleanup()
+        
+        if jpeg_bytes is None:
+            return self._create_error_image(description)
+        
+        try:
+            # Write then rename, so concurrent render workers never read a partial file
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix='.tmp', delete=False) as f:
+                f.write(jpeg_bytes)
+            os.replace(f.name, cache_path)
+            _prune_render_cache(self.cache_dir)
+        except OSError as e:
+            logger.warning("Could not cache render for %s: %s", description, e)
+        return jpeg_bytes
             
-            logger.info(f"Attempting SVG conversion with rsvg-convert for {description}...")
+    def _convert_svg_to_png(self, svg_data, output_path, description=""):
+        """
+        Rasterize SVG and save it as JPG
+        
+        Args:
+            svg_data: SVG content as string
+            output_path: Path to save JPG output
+            description: Optional description for logging
             
-            # Create temporary file with correct encoding
-            temp_svg = tempfile.NamedTemporaryFile(suffix='.svg', delete=False)
-            temp_svg.write(svg_data.encode('utf-8'))
-            temp_svg.close()
+        Returns:
+            bool: True if conversion succeeded, False otherwise
+        """
+        jpeg_bytes = self._render_jpg(svg_data, description)
+        
+        # Single write per image; an empty file prevents further errors if rendering failed
+        Path(output_path).write_bytes(jpeg_bytes or b'')
+        return jpeg_bytes is not None
+    
+    def _rasterize_svg(self, svg_data, svg_bytes, temp_svg, description=""):
+        """
+        Rasterize SVG to JPG data using multiple methods
+        
+        Every method renders PNG data in memory; nothing here touches the output file.
+        
+        Args:
+            svg_data: SVG content as string
+            svg_bytes: The same content encoded as UTF-8, shared by every method
+            temp_svg: Lazily written copy of svg_data, for tools that need a file
+            description: Optional description for logging
             
+        Returns:
+            JPG data, or None if every method failed
+        """
+        # Method 1: Render in-process with resvg if installed (fastest, no process spawn)
+        if resvg_py is not None:
             try:
-                # First try with specific DPI for higher quality - convert to JPG
-                subprocess.run(['rsvg-convert', '-d', '300', '-p', '300', '-f', 'png', 
-                              '-o', str(output_path).replace('.jpg', '.png'), temp_svg.name], 
-                              check=True, timeout=30)
-                # Convert PNG to JPG
-                self._convert_png_to_jpg(str(output_path).replace('.jpg', '.png'), str(output_path))
-                success = True
-            except (subprocess.SubprocessError, subprocess.TimeoutExpired) as e:
-                logger.warning(f"High-DPI rsvg-convert failed: {e}. Trying standard version...")
-                try:
-                    # Fallback to standard conversion
-                    subprocess.run(['rsvg-convert', '-f', 'png', '-o', str(output_path).replace('.jpg', '.png'), temp_svg.name], 
-                                  check=True, timeout=30)
-                    # Convert PNG to JPG
-                    self._convert_png_to_jpg(str(output_path).replace('.jpg', '.png'), str(output_path))
-                    success = True
-                except Exception:
-                    success = False
-            
-            # Clean up temp file
-            os.unlink(temp_svg.name)
-            
-            if success:
-                logger.info(f"Successfully converted SVG to PNG using rsvg-convert")
-                return True
+                logger.info("Attempting SVG conversion with resvg for %s...", description)
+                png_bytes = bytes(resvg_py.svg_to_bytes(svg_string=svg_data, dpi=300))
                 
-        except Exception as e:
-            logger.warning(f"rsvg-convert method failed: {e}. Trying other methods...")
+                if png_bytes:
+                    jpeg_bytes = self._encode_png_as_jpg(png_bytes)
+                    logger.info("Successfully converted SVG to JPG using resvg")
+                    return jpeg_bytes
+                    
+            except Exception as e:
+                logger.warning("resvg method failed: %s. Trying other methods...", e)
         
-        # Method 2: Try Inkscape if available (excellent font handling)
-        try:
-            import subprocess
-            
-            logger.info(f"Attempting SVG conversion with Inkscape for {description}...")
+        # Method 2: librsvg via rsvg-convert subprocess (good support for SVG features)
+        if self._rsvg_convert:
             try:
-                subprocess.run(['inkscape', '--export-filename', str(output_path), 
-                               '--export-dpi', '300', svg_path], 
-                               check=True, timeout=60)
-                logger.info(f"Successfully converted SVG to PNG using Inkscape")
-                return True
+                logger.info("Attempting SVG conversion with rsvg-convert for %s...", description)
+                
+                # Pipe SVG in through stdin and PNG out through stdout, no temp files
+                png_bytes = subprocess.run([self._rsvg_convert, '-d', '300', '-p', '300', '-f', 'png'],
+                                           input=svg_bytes, stdout=subprocess.PIPE,
+                                           check=True, timeout=30).stdout
+                
+                if png_bytes:
+                    jpeg_bytes = self._encode_png_as_jpg(png_bytes)
+                    logger.info("Successfully converted SVG to JPG using rsvg-convert")
+                    return jpeg_bytes
+                    
             except Exception as e:
-                logger.warning(f"Inkscape conversion failed: {e}. Trying CairoSVG...")
-        except Exception:
-            pass
-            
-        # Method 3: Use CairoSVG with explicit UTF-8 encoding and unsafe option
+                logger.warning("rsvg-convert method failed: %s. Trying other methods...", e)
+        
+        # Method 3: Render in-process with CairoSVG (explicit UTF-8 encoding and unsafe option)
         try:
-            logger.info(f"Attempting SVG conversion with CairoSVG (unsafe=True) for {description}...")
+            logger.info("Attempting SVG conversion with CairoSVG (unsafe=True) for %s...", description)
             
             # Try with unsafe option first for better feature support
-            import io
-            png_data = io.BytesIO()
-            cairosvg.svg2png(bytestring=svg_data.encode('utf-8'), 
-                             write_to=png_data, 
-                             unsafe=True)
-            
-            # Write the PNG data to temporary file, then convert to JPG
-            temp_png = str(output_path).replace('.jpg', '.png')
-            with open(temp_png, "wb") as f:
-                f.write(png_data.getvalue())
+            png_bytes = cairosvg.svg2png(bytestring=svg_bytes, unsafe=True, output_width=1080)
             
-            if os.path.exists(temp_png) and os.path.getsize(temp_png) > 0:
-                # Convert to JPG
-                self._convert_png_to_jpg(temp_png, str(output_path))
-                logger.info(f"Successfully converted SVG to JPG using CairoSVG (unsafe=True)")
-                return True
+            if png_bytes:
+                jpeg_bytes = self._encode_png_as_jpg(png_bytes)
+                logger.info("Successfully converted SVG to JPG using CairoSVG (unsafe=True)")
+                return jpeg_bytes
                 
         except Exception as e:
-            logger.warning(f"CairoSVG conversion with unsafe=True failed: {e}. Trying standard CairoSVG...")
+            logger.warning("CairoSVG conversion with unsafe=True failed: %s. Trying standard CairoSVG...", e)
             
             try:
                 # Try standard CairoSVG without unsafe
-                logger.info(f"Attempting SVG conversion with standard CairoSVG for {description}...")
-                temp_png = str(output_path).replace('.jpg', '.png')
-                cairosvg.svg2png(bytestring=svg_data.encode('utf-8'), write_to=temp_png)
+                logger.info("Attempting SVG conversion with standard CairoSVG for %s...", description)
+                png_bytes = cairosvg.svg2png(bytestring=svg_bytes, output_width=1080)
                 
-                if os.path.exists(temp_png) and os.path.getsize(temp_png) > 0:
-                    # Convert to JPG
-                    self._convert_png_to_jpg(temp_png, str(output_path))
-                    logger.info(f"Successfully converted SVG to JPG using standard CairoSVG")
-                    return True
+                if png_bytes:
+                    jpeg_bytes = self._encode_png_as_jpg(png_bytes)
+                    logger.info("Successfully converted SVG to JPG using standard CairoSVG")
+                    return jpeg_bytes
             except Exception as e2:
-                logger.warning(f"Standard CairoSVG failed: {e2}. Trying direct file conversion...")
+                logger.warning("Standard CairoSVG failed: %s. Trying direct file conversion...", e2)
                 
                 try:
                     # Final fallback - try again with cairosvg directly on file
-                    logger.info(f"Falling back to direct CairoSVG file conversion for {description}...")
-                    temp_png = str(output_path).replace('.jpg', '.png')
-                    cairosvg.svg2png(url=str(svg_path), write_to=temp_png)
+                    logger.info("Falling back to direct CairoSVG file conversion for %s...", description)
+                    png_bytes = cairosvg.svg2png(url=temp_svg.path, output_width=1080)
                     
-                    if os.path.exists(temp_png) and os.path.getsize(temp_png) > 0:
-                        # Convert to JPG
-                        self._convert_png_to_jpg(temp_png, str(output_path))
-                        logger.info(f"Successfully converted SVG to JPG using direct file CairoSVG")
-                        return True
+                    if png_bytes:
+                        jpeg_bytes = self._encode_png_as_jpg(png_bytes)
+                        logger.info("Successfully converted SVG to JPG using direct file CairoSVG")
+                        return jpeg_bytes
                 except Exception as e3:
-                    logger.error(f"All CairoSVG methods failed. Last error: {e3}")
+                    logger.warning("All CairoSVG methods failed. Last error: %s. Trying Inkscape...", e3)
+        
+        # Method 4: Last resort, Inkscape if available (excellent font handling, but a separate process)
+        if self._inkscape:
+            try:
+                logger.info("Attempting SVG conversion with Inkscape for %s...", description)
+                png_bytes = None
+                
+                # Prefer the persistent shell; fall back to a one-shot export if it died
+                shell = self._get_inkscape_shell()
+                if shell:
+                    try:
+                        png_bytes = shell.convert(temp_svg.path)
+                    except Exception as e:
+                        logger.warning("Inkscape shell export failed: %s. Retrying with one-shot Inkscape...", e)
+                        self._close_inkscape_shell()
+                
+                if not png_bytes:
+                    png_bytes = subprocess.run([self._inkscape, '--export-type=png', '--export-filename=-',
+                                                '--export-dpi', '300', temp_svg.path],
+                                               stdout=subprocess.PIPE, check=True, timeout=60).stdout
+                if png_bytes:
+                    jpeg_bytes = self._encode_png_as_jpg(png_bytes)
+                    logger.info("Successfully converted SVG to JPG using Inkscape")
+                    return jpeg_bytes
+            except Exception as e:
+                logger.error("Inkscape conversion failed: %s", e)
         
         # If we get here, all methods failed
-        logger.error(f"All SVG conversion methods failed for {description}.")
+        logger.error("All SVG conversion methods failed for %s.", description)
+        return None
+    
+    def _create_error_image(self, description=""):
+        """
+        Create a simple error image as fallback when rasterization fails
         
-        # Create a simple error image as fallback
-        try:
-            from PIL import Image, ImageDraw
-            
-            logger.info(f"Creating error fallback image for {description}...")
-            img = Image.new('RGB', (1080, 1080), color='white')
-            draw = ImageDraw.Draw(img)
-            
-            # Add error text
-            draw.text((100, 500), f"Error converting SVG to PNG\n{description}", fill='black')
-            img.save(output_path)
+        Args:
+            description: Optional description shown on the image
             
-            logger.info(f"Created fallback error image")
-            return True
+        Returns:
+            JPG data, or None if the error image could not be created
+        """
+        try:
+            logger.info("Creating error fallback image for %s...", description)
+            jpeg_bytes = _error_image_jpg(description)
+            logger.info("Created fallback error image")
+            return jpeg_bytes
         except Exception as e4:
-            logger.error(f"Failed to create error image: {e4}")
-            # Create an empty file to prevent further errors
-            with open(output_path, 'wb') as f:
-                f.write(b'')
-            return False
+            logger.error("Failed to create error image: %s", e4)
+            return None
+    
+    def _build_cover_svg(self, cover_data: Dict[str, Any]) -> str:
+        """
+        Fill the cover template with content
+        
+        Args:
+            cover_data: Cover data from content agent
+            
+        Returns:
+            SVG content ready for rasterization
+        """
+        if "cover" not in self._templates_src:
+            raise FileNotFoundError(f"Cover template not found: {self.templates['cover']}")
+        
+        # Fill all placeholders in one pass; missing headings keep the sample text
+        return self._templates_src["cover"].substitute(
+            hashtag=cover_data['hashtag'].translate(_XML_ESCAPE),
+            heading_line1=cover_data.get('heading_line1', "人工智能如何").translate(_XML_ESCAPE),
+            heading_line2=cover_data.get('heading_line2', "改變數據分析？").translate(_XML_ESCAPE),
+            grey_box_text=cover_data.get('grey_box_text', "掌握AI驅動的數據革命！").translate(_XML_ESCAPE)
+        )
     
     def generate_cover(self, cover_data: Dict[str, Any]) -> Path:
         """
@@ -259,93 +897,38 @@ class TemplateProcessor:
         """
         output_path = self.output_dir / "cover.jpg"
         
-        if not self.templates["cover"].exists():
-            raise FileNotFoundError(f"Cover template not found: {self.templates['cover']}")
-        
-        with open(self.templates["cover"], "r", encoding="utf-8") as f:
-            svg_content = f.read()
-        
-        # Replace template placeholders with content
-        svg_content = svg_content.replace("#{Hashtag}", f"#{cover_data['hashtag']}")
-        
-        # Handle Chinese text properly - replace full-text elements rather than just placeholder text
-        # For heading line 1 (top line)
-        if 'heading_line1' in cover_data:
-            heading_line1 = cover_data['heading_line1']
-            svg_content = self._replace_text_element(svg_content, "heading_line1", heading_line1)
-        
-        # For heading line 2 (bottom line)
-        if 'heading_line2' in cover_data:
-            heading_line2 = cover_data['heading_line2']
-            svg_content = self._replace_text_element(svg_content, "heading_line2", heading_line2)
-        
-        # For grey box text
-        if 'grey_box_text' in cover_data:
-            grey_box_text = cover_data['grey_box_text']
-            svg_content = self._replace_text_element(svg_content, "grey_box_text", grey_box_text)
-        
-        # Write temporary SVG
-        temp_svg_path = self.output_dir / "cover.svg"
-        
-        # Ensure all text elements have proper font-family for Chinese characters
-        svg_content = self._ensure_chinese_font_support(svg_content)
-        
-        # Write the updated SVG with explicit UTF-8 encoding
-        with open(temp_svg_path, "w", encoding="utf-8") as f:
-            f.write(svg_content)
-        
-        # Read SVG content
-        with open(temp_svg_path, "r", encoding="utf-8") as f:
-            svg_data = f.read()
-        
         # Use our helper method to convert SVG to PNG
-        self._convert_svg_to_png(svg_data, temp_svg_path, output_path, description="cover")
+        self._convert_svg_to_png(self._build_cover_svg(cover_data), output_path, description="cover")
             
-        logger.info(f"Generated cover image: {output_path}")
+        logger.info("Generated cover image: %s", output_path)
         
         return output_path
         
-    def _replace_text_element(self, svg_content: str, element_id: str, new_text: str) -> str:
+    def _build_content_svg(self, page_data: Dict[str, Any], page_number: int, with_image: bool = True) -> str:
         """
-        Replace text in an SVG element by ID
+        Fill a content page template with content
         
         Args:
-            svg_content: The SVG content as a string
-            element_id: The ID of the element to replace
-            new_text: The new text content
+            page_data: Page data from content agent
+            page_number: Page number
+            with_image: Whether to use template with image area
             
         Returns:
-            Updated SVG content
+            SVG content ready for rasterization
         """
-        import re
-        # Look for a text element with the specified ID using regex
-        pattern = rf'(<text[^>]*id="{element_id}"[^>]*>)(.*?)(</text>)'
-        match = re.search(pattern, svg_content, re.DOTALL)
-        
-        if match:
-            # Replace the font-family attribute to include Chinese fonts
-            opening_tag = match.group(1)
-            if "font-family" in opening_tag:
-                # Add Chinese fonts to the font-family list
-                opening_tag = re.sub(
-                    r'font-family="([^"]*)"', 
-                    r'font-family="Songti SC, PingFang SC, Heiti SC, STKaiti, Kaiti SC, SimSong, Noto Sans CJK SC, Arial Unicode MS, \1"', 
-                    opening_tag
-                )
-            
-            # Replace only the content between the opening and closing tags
-            return svg_content.replace(match.group(0), f"{opening_tag}{new_text}{match.group(3)}")
-        else:
-            # If no match found, try simple text replacement as fallback
-            # This is less precise but may work with simpler templates
-            if element_id == "heading_line1":
-                svg_content = svg_content.replace("人工智能如何", new_text)
-            elif element_id == "heading_line2":
-                svg_content = svg_content.replace("改變數據分析？", new_text)
-            elif element_id == "grey_box_text":
-                svg_content = svg_content.replace("掌握AI驅動的數據革命！", new_text)
-            
-            return svg_content
+        # Choose template based on whether we want image area
+        template_name = "content_withimage" if with_image else "content_withoutimage"
+        
+        if template_name not in self._templates_src:
+            raise FileNotFoundError(f"Template not found: {self.templates[template_name]}")
+        
+        # Fill all placeholders in one pass; title and main point become pre-wrapped <tspan> lines
+        boxes = self._text_boxes[template_name]
+        return self._templates_src[template_name].substitute(
+            page_number=f"{page_number:02d}",
+            content_title=_layout_text_box(page_data['title'], boxes['content_title']),
+            main_point=_layout_text_box(page_data['main_point'], boxes['main_point'])
+        )
     
     def generate_content_page(self, page_data: Dict[str, Any], page_number: int, with_image: bool = True) -> Path:
         """
@@ -361,108 +944,60 @@ class TemplateProcessor:
         """
         output_path = self.output_dir / f"content_{page_number:02d}.jpg"
         
-        # Choose template based on whether we want image area
-        template_name = "content_withimage" if with_image else "content_withoutimage"
-        
-        if not self.templates[template_name].exists():
-            raise FileNotFoundError(f"Template not found: {self.templates[template_name]}")
-        
-        with open(self.templates[template_name], "r", encoding="utf-8") as f:
-            svg_content = f.read()
-        
-        # Replace template placeholders with content
-        svg_content = svg_content.replace("0{page_number}", f"{page_number:02d}")
-        
-        # Use text element replacement for title to ensure Chinese font support
-        svg_content = self._replace_text_element(svg_content, "content_title", page_data['title'])
-        
-        # Get main_point text without manual line breaks - let CSS handle wrapping
-        main_point = page_data['main_point']
-        
-        # Replace the main_point placeholder in the foreignObject
-        svg_content = svg_content.replace(
-            '<div id="main_point">核心訊息放這裡（最多50字）</div>',
-            f'<div id="main_point">{main_point}</div>'
-        )
-        
-        # Write temporary SVG
-        temp_svg_path = self.output_dir / f"content_{page_number:02d}.svg"
-        
-        # Ensure all text elements have proper font-family for Chinese characters
-        svg_content = self._ensure_chinese_font_support(svg_content)
-        
-        # Write the updated SVG with explicit UTF-8 encoding
-        with open(temp_svg_path, "w", encoding="utf-8") as f:
-            f.write(svg_content)
-        
-        # Read SVG content
-        with open(temp_svg_path, "r", encoding="utf-8") as f:
-            svg_data = f.read()
-        
         # Use our helper method to convert SVG to PNG
-        self._convert_svg_to_png(svg_data, temp_svg_path, output_path, description=f"content page {page_number}")
+        svg_data = self._build_content_svg(page_data, page_number, with_image)
+        self._convert_svg_to_png(svg_data, output_path, description=f"content page {page_number}")
             
-        logger.info(f"Generated content image {page_number}: {output_path}")
+        logger.info("Generated content image %s: %s", page_number, output_path)
         
         return output_path
-        
-    def _create_multiline_text(self, text_id: str, x: int, y: int, text: str, font_size: int, line_height: int, align="left", margin=40) -> str:
+    
+    def generate_all_pages(self, cover_data: Dict[str, Any], pages_data: List[Dict[str, Any]]) -> List[Path]:
         """
-        Create SVG multiline text element
+        Generate the cover and all content pages, rasterizing pages in parallel
+        
+        Text substitution happens in this process; the independent, CPU-bound
+        rasterization of each page is spread over a process pool sized to the
+        CPU count (capped by the container memory limit). The pool is shared
+        process-wide and stays up until exit, so later posts skip worker
+        startup and reuse each worker's warm rasterizers.
         
         Args:
-            text_id: ID for the text element
-            x: X coordinate
-            y: Y coordinate
-            text: Text content with line breaks
-            font_size: Font size
-            line_height: Line height
-            align: Text alignment ("left", "center", or "right")
-            margin: Margin to use for left or right alignment
+            cover_data: Cover data from content agent
+            pages_data: Content pages from content agent
             
         Returns:
-            SVG text element with tspan elements for line breaks
+            Paths to generated images, cover first
         """
-        lines = text.split("\n")
-        
-        # Adjust font size if there are too many lines to fit
-        max_lines_before_resize = 5
-        if len(lines) > max_lines_before_resize:
-            # Scale down font size based on number of lines
-            scale_factor = max(0.7, max_lines_before_resize / len(lines))
-            adjusted_font_size = int(font_size * scale_factor)
-            adjusted_line_height = int(line_height * scale_factor)
-        else:
-            adjusted_font_size = font_size
-            adjusted_line_height = line_height
-        
-        # Calculate total height of text block for vertical centering
-        total_height = adjusted_line_height * (len(lines) - 1)
-        start_y = y - (total_height / 2)
-        
-        # Determine text-anchor based on alignment
-        if align == "left":
-            text_anchor = "start"
-            # For left alignment, place text at the left edge of the container plus margin
-            text_x = x - 360 + margin  # 360 is approximately half the width of the container (780/2)
-        elif align == "right":
-            text_anchor = "end"
-            text_x = x + 350 - margin  # 350 is approximately half the width of the container
-        else:  # center
-            text_anchor = "middle"
-            text_x = x
-        
-        # Use Chinese fonts first in the font-family list for better Chinese character support
-        text_element = f'<text id="{text_id}" x="{text_x}" font-family="Songti SC, PingFang SC, Heiti SC, STKaiti, Kaiti SC, SimSong, Noto Sans CJK SC, Arial Unicode MS, Arial, sans-serif" font-weight="bold" font-size="{adjusted_font_size}" text-anchor="{text_anchor}" fill="#000000">'
-        
-        for i, line in enumerate(lines):
-            line_y = start_y + (i * adjusted_line_height)
-            text_element += f'<tspan x="{text_x}" y="{line_y}">{line}</tspan>'
-        
-        text_element += '</text>'
-        return text_element
-        
-    def _ensure_chinese_font_support(self, svg_content: str) -> str:
+        tasks = [(self._build_cover_svg(cover_data), self.output_dir / "cover.jpg", "cover")]
+        for i, page in enumerate(pages_data):
+            page_number = i + 1
+            with_image = bool(page.get("illustration_description"))
+            tasks.append((
+                self._build_content_svg(page, page_number, with_image),
+                self.output_dir / f"content_{page_number:02d}.jpg",
+                f"content page {page_number}"
+            ))
+        
+        if len(tasks) > 1 and _render_worker_count() > 1:
+            pool = None
+            try:
+                pool = _get_render_pool(str(self.templates_dir), self.allow_inkscape, str(self.cache_dir))
+                list(pool.map(_render_in_worker, tasks))
+                logger.info("Generated %s images with worker processes", len(tasks))
+                return [output_path for _, output_path, _ in tasks]
+            except Exception as e:
+                logger.warning("Parallel rendering failed: %s. Rendering pages sequentially...", e)
+                if pool is not None:
+                    _discard_render_pool(pool)
+        
+        for svg_data, output_path, description in tasks:
+            self._convert_svg_to_png(svg_data, output_path, description=description)
+        
+        return [output_path for _, output_path, _ in tasks]
+    
+    @staticmethod
+    def _ensure_chinese_font_support(svg_content: str) -> str:
         """
         Process SVG to ensure all text elements have font-family with Chinese support
         
@@ -472,153 +1007,27 @@ class TemplateProcessor:
         Returns:
             Updated SVG content with proper font-family attributes
         """
-        import re
+        # The bundled templates ship with fonts already embedded; skip the regex passes
+        if svg_content.startswith(_XML_DECL) and '@font-face' in svg_content and 'PingFang SC' in svg_content:
+            return svg_content
         
         # Ensure the SVG has proper XML declaration with UTF-8 encoding
         if not svg_content.startswith('<?xml'):
-            svg_content = '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n' + svg_content
-        elif 'encoding=' not in svg_content.split('\n')[0]:
+            svg_content = _XML_DECL + '\n' + svg_content
+        else:
             # Replace existing XML declaration with one that includes UTF-8 encoding
-            svg_content = re.sub(
-                r'<\?xml[^>]*\?>', 
-                '<?xml version="1.0" encoding="UTF-8" standalone="no"?>', 
-                svg_content
-            )
+            decl = _XML_DECL_RE.match(svg_content)
+            if decl and 'encoding=' not in decl.group(0):
+                svg_content = _XML_DECL + svg_content[decl.end():]
             
         # Add embedded font definition if svg element exists
         if '<svg' in svg_content and '<style' not in svg_content:
-            # Create style element with embedded font definitions
-            font_style = """
-<style type="text/css">
-@font-face {
-  font-family: 'Songti SC';
-  src: local('Songti SC');
-  font-weight: normal;
-  font-style: normal;
-}
-@font-face {
-  font-family: 'PingFang SC';
-  src: local('PingFang SC');
-  font-weight: normal;
-  font-style: normal;
-}
-@font-face {
-  font-family: 'Heiti SC';
-  src: local('Heiti SC');
-  font-weight: normal;
-  font-style: normal;
-}
-@font-face {
-  font-family: 'Kaiti SC';
-  src: local('Kaiti SC');
-  font-weight: normal;
-  font-style: normal;
-}
-</style>
-"""
             # Insert style element after SVG opening tag
-            svg_content = re.sub(r'(<svg[^>]*>)', r'\1' + font_style, svg_content)
-        
-        # Find all text elements that have a font-family attribute
-        pattern = r'(<text[^>]*font-family="([^"]*)"[^>]*>)'
-        matches = re.finditer(pattern, svg_content)
-        
-        # Replace each font-family attribute to include Chinese fonts
-        for match in matches:
-            full_tag = match.group(1)
-            # Only replace if Chinese fonts aren't already included
-            if not any(font in full_tag for font in ['PingFang', 'Heiti', 'Noto Sans CJK', 'Arial Unicode']):
-                # Add Chinese fonts to the beginning of the font list
-                new_tag = re.sub(
-                    r'font-family="([^"]*)"', 
-                    r'font-family="Songti SC, PingFang SC, Heiti SC, STKaiti, Kaiti SC, SimSong, Noto Sans CJK SC, Arial Unicode MS, \1"', 
-                    full_tag
-                )
-                svg_content = svg_content.replace(full_tag, new_tag)
-        
-        # Find all text elements that don't have a font-family attribute and add one
-        pattern = r'(<text[^>]*)(>)'
-        matches = re.finditer(pattern, svg_content)
-        
-        for match in matches:
-            full_tag = match.group(0)
-            # Only process tags that don't already have font-family
-            if 'font-family' not in full_tag:
-                start_tag = match.group(1)
-                end_bracket = match.group(2)
-                # Add font-family attribute
-                new_tag = f'{start_tag} font-family="Songti SC, PingFang SC, Heiti SC, STKaiti, Kaiti SC, SimSong, Noto Sans CJK SC, Arial Unicode MS, Arial, sans-serif"{end_bracket}'
-                svg_content = svg_content.replace(full_tag, new_tag)
-        
-        return svg_content
-    
-    def _split_text_for_svg(self, text: str, max_chars_per_line: int = 16) -> list:
-        """
-        Split text into lines suitable for SVG rendering
+            svg_content = _SVG_OPEN_RE.sub(lambda m: m.group(1) + _FONT_FACE_STYLE, svg_content, count=1)
         
-        Args:
-            text: Text to split
-            max_chars_per_line: Maximum characters per line
-            
-        Returns:
-            List of text lines
-        """
-        words = text.split()
-        lines = []
-        current_line = ""
-        
-        for word in words:
-            # Check if adding this word would exceed the line limit
-            test_line = current_line + " " + word if current_line else word
-            
-            if len(test_line) <= max_chars_per_line:
-                current_line = test_line
-            else:
-                # If current line is not empty, save it and start new line
-                if current_line:
-                    lines.append(current_line)
-                    current_line = word
-                else:
-                    # Word is too long, split it
-                    while len(word) > max_chars_per_line:
-                        lines.append(word[:max_chars_per_line])
-                        word = word[max_chars_per_line:]
-                    current_line = word
-        
-        # Add the last line if it's not empty
-        if current_line:
-            lines.append(current_line)
-            
-        return lines
-    
-    def _create_svg_text_block(self, text_lines: list, x: int, y: int, font_size: int, 
-                              line_height: int, max_width: int, fill: str = "#1d1d1f") -> str:
-        """
-        Create SVG text block with multiple lines
-        
-        Args:
-            text_lines: List of text lines
-            x: X position (center)
-            y: Y position (center of text block)
-            font_size: Font size
-            line_height: Line height
-            max_width: Maximum width for text
-            fill: Text color
-            
-        Returns:
-            SVG text element string
-        """
-        # Calculate starting Y position for vertical centering
-        total_height = len(text_lines) * line_height
-        start_y = y - (total_height / 2) + (line_height / 2)
-        
-        # Create the text element
-        svg_text = f'''<text x="{x}" font-family="Songti SC, PingFang SC, Heiti SC, STKaiti, Kaiti SC, SimSong, Noto Sans CJK SC, Arial Unicode MS, Helvetica, Arial, sans-serif" font-weight="600" font-size="{font_size}" text-anchor="middle" fill="{fill}">'''
-        
-        for i, line in enumerate(text_lines):
-            line_y = start_y + (i * line_height)
-            svg_text += f'\n    <tspan x="{x}" y="{line_y}">{line}</tspan>'
-        
-        svg_text += '\n  </text>'
+        if '<text' not in svg_content:
+            return svg_content
         
-        return svg_text
\ No newline at end of file
+        # One pass over all text elements: prepend Chinese fonts to existing
+        # font-family lists and add a font-family where there is none
+        return _TEXT_TAG_RE.sub(_add_cjk_fonts_to_text_tag, svg_content)
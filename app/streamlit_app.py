@@ -3,6 +3,7 @@ Streamlit web interface for Instagram Content Generation Workflow
 """
 
 import streamlit as st
+import io
 import os
 import sys
 from pathlib import Path
@@ -14,6 +15,15 @@ sys.path.append(str(Path(__file__).parent))
 
 from app_minimal import SimpleInstagramWorkflow
 
+# Quick-start requests shown in the sidebar
+EXAMPLE_REQUESTS = (
+    "Create a post about AI ethics in tech",
+    "Share tips for machine learning beginners",
+    "Explain the latest ChatGPT features",
+    "Post about data science career advice",
+    "Discuss the future of artificial intelligence"
+)
+
 
 def main():
     st.set_page_config(
@@ -80,6 +90,7 @@ def main():
         # Content request input
         request = st.text_area(
             "Content Request",
+            key="content_request",
             placeholder="Enter your content request here... (e.g., 'Create an Instagram post about AI ethics')",
             height=150,
             help="Describe what kind of Instagram content you want to generate"
@@ -134,29 +145,20 @@ def main():
         
         # Quick examples
         st.subheader("💡 Example Requests")
-        examples = [
-            "Create a post about AI ethics in tech",
-            "Share tips for machine learning beginners",
-            "Explain the latest ChatGPT features", 
-            "Post about data science career advice",
-            "Discuss the future of artificial intelligence"
-        ]
-        
-        for example in examples:
-            if st.button(f"📝 {example}", key=f"example_{hash(example)}"):
-                st.session_state.example_request = example
-                st.rerun()
-        
-        # Load example if selected
-        if "example_request" in st.session_state:
-            request = st.session_state.example_request
-            del st.session_state.example_request
+        for i, example in enumerate(EXAMPLE_REQUESTS):
+            # The callback fills the request box before the click's own rerun, so no extra rerun is needed
+            st.button(f"📝 {example}", key=f"example_{i}", on_click=use_example, args=(example,))
     
     # Display results
     if "workflow_result" in st.session_state:
         display_results(st.session_state.workflow_result)
 
 
+def use_example(example):
+    """Put an example request into the content request box"""
+    st.session_state.content_request = example
+
+
 def generate_content(request, content_only, send_email, recipient_email, output_dir):
     """Generate content using the workflow"""
     
@@ -205,6 +207,22 @@ def generate_content(request, content_only, send_email, recipient_email, output_
         st.error(f"❌ Error: {str(e)}")
 
 
+@st.cache_data(show_spinner=False, max_entries=64)
+def _read_file_bytes(path, mtime):
+    """Read an output file once per version, instead of on every rerun"""
+    return Path(path).read_bytes()
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _load_thumbnail(path, mtime, max_side=720):
+    """Decode and downscale a generated image once per version, for display"""
+    buffer = io.BytesIO()
+    with Image.open(path) as image:
+        image.thumbnail((max_side, max_side))
+        image.convert("RGB").save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
 def display_results(result):
     """Display workflow results"""
     
@@ -273,7 +291,7 @@ def display_results(result):
             for img in images:
                 if "path" in img and os.path.exists(img["path"]):
                     try:
-                        image = Image.open(img["path"])
+                        image = _load_thumbnail(img["path"], os.path.getmtime(img["path"]))
                         st.image(
                             image, 
                             caption=f"{img.get('type', 'Unknown')} - {img.get('file_name', 'Unknown')}", 
@@ -296,21 +314,21 @@ def display_results(result):
             
             # List files in output directory
             if os.path.exists(output_dir):
-                files = os.listdir(output_dir)
+                # scandir yields names, types and stats in one directory walk
+                with os.scandir(output_dir) as it:
+                    files = sorted((entry for entry in it if entry.is_file()), key=lambda entry: entry.name)
                 if files:
-                    for file in files:
-                        file_path = os.path.join(output_dir, file)
-                        file_size = os.path.getsize(file_path)
-                        st.write(f"📄 {file} ({file_size:,} bytes)")
+                    for entry in files:
+                        file_stat = entry.stat()
+                        st.write(f"📄 {entry.name} ({file_stat.st_size:,} bytes)")
                         
-                        # Download button for files
-                        with open(file_path, "rb") as f:
-                            st.download_button(
-                                label=f"⬇️ Download {file}",
-                                data=f.read(),
-                                file_name=file,
-                                mime="application/octet-stream"
-                            )
+                        # Download button for files; contents are cached until the file changes
+                        st.download_button(
+                            label=f"⬇️ Download {entry.name}",
+                            data=_read_file_bytes(entry.path, file_stat.st_mtime),
+                            file_name=entry.name,
+                            mime="application/octet-stream"
+                        )
                 else:
                     st.info("No files found in output directory")
             else:
@@ -5,19 +5,27 @@ Utility functions for the Instagram content generation workflow
 import json
 import os
 import logging
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any
 
+try:
+    # Optional: Rust-backed JSON encoder that writes UTF-8 bytes directly
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger("ig_agent.utils")
 
 
-def save_content_json(content_json: Dict[str, Any], output_dir: str) -> str:
+def save_content_json(content_json: Dict[str, Any], output_dir: str, *, pretty: bool = False) -> str:
     """
     Save content JSON to output directory
     
     Args:
         content_json: Generated content to save
         output_dir: Directory to save content in
+        pretty: Indent the output for reading by hand (slower, larger file)
         
     Returns:
         Path to saved content file
@@ -26,8 +34,16 @@ def save_content_json(content_json: Dict[str, Any], output_dir: str) -> str:
         os.makedirs(output_dir, exist_ok=True)
         content_path = os.path.join(output_dir, "content.json")
         
-        with open(content_path, 'w', encoding='utf-8') as f:
-            json.dump(content_json, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            # Same output as json.dump: non-ASCII kept as is, compact unless pretty
+            with open(content_path, 'wb') as f:
+                f.write(orjson.dumps(content_json, option=orjson.OPT_INDENT_2 if pretty else 0))
+        else:
+            with open(content_path, 'w', encoding='utf-8') as f:
+                if pretty:
+                    json.dump(content_json, f, ensure_ascii=False, indent=2)
+                else:
+                    json.dump(content_json, f, ensure_ascii=False, separators=(',', ':'))
         
         logger.info(f"Content saved to {content_path}")
         return content_path
@@ -47,13 +63,11 @@ def ensure_output_directory(base_dir: str = "output") -> str:
     Returns:
         Path to timestamped output directory
     """
-    from datetime import datetime
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    date_folder = datetime.now().strftime("%Y-%m-%d")
+    # One clock reading, so a run started at midnight can't get a mismatched date folder
+    now = datetime.now()
     
-    output_dir = Path(base_dir) / date_folder / timestamp
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir = Path(base_dir) / now.strftime("%Y-%m-%d") / now.strftime("%Y%m%d_%H%M%S")
+    output_dir.mkdir(parents=True, exist_ok=True)
     
     return str(output_dir)
 
@@ -69,6 +83,8 @@ def load_prompt(prompt_name: str, prompts_dir: str = None) -> str:
     Returns:
         Prompt content
     """
+    from .ig_agent.prompt_loader import read_prompt
+    
     if not prompts_dir:
         from .configuration import get_prompts_dir
         prompts_dir = get_prompts_dir()
@@ -79,19 +95,29 @@ def load_prompt(prompt_name: str, prompts_dir: str = None) -> str:
     prompt_path = os.path.join(prompts_dir, prompt_name)
     
     try:
-        with open(prompt_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return read_prompt(prompt_path)
     except FileNotFoundError:
         raise FileNotFoundError(f"Prompt file not found: {prompt_path}")
 
 
+_dependencies_validated = False
+
+
 def validate_dependencies():
     """
     Validate that all required dependencies are available
     
+    Required packages are imported, so one that is installed but broken fails
+    here rather than deep inside a workflow node. Only the first successful
+    call does any work; the installed packages don't change while the process runs.
+    
     Raises:
         ImportError: If required dependencies are missing
     """
+    global _dependencies_validated
+    if _dependencies_validated:
+        return
+    
     required_packages = [
         "langchain_xai",
         "langgraph",
@@ -124,4 +150,6 @@ def validate_dependencies():
         try:
             __import__(package)
         except (ImportError, OSError) as e:
-            logger.warning(f"Optional package '{package}' not available. Some features may be limited. Error: {e}")
\ No newline at end of file
+            logger.warning(f"Optional package '{package}' not available. Some features may be limited. Error: {e}")
+    
+    _dependencies_validated = True
\ No newline at end of file